@@ -1,27 +1,27 @@
 import os
+import re
 import sys
 import ast
-import libcst as cst
-from libcst.metadata import PositionProvider
 import datetime
-from typing import List, Any, Dict, Union
-from pydantic import BaseModel
-import tomli
-import tomli_w
-import uuid
+from typing import List, Any, Dict, Tuple, Union
+from dataclasses import dataclass, asdict
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
 import enum
+import functools
+import itertools
 import subprocess
-from copy import deepcopy
-import subprocess_tee
 import tempfile
 import shutil
-from paramit.nb import (
-    convert_ipynb_to_py,
-    convert_source_code_to_ipynb,
-    is_jupyter_kernel_installed,
-)
 from paramit.constants import YELLOW, MAGENTA, GREEN, RED, RESET
 
+# tomli_w, subprocess_tee, and paramit.nb (which pulls in jupytext) are
+# imported lazily at their call sites so `paramit --help` style invocations
+# don't pay their import cost.
+
 sys.stdout.reconfigure(line_buffering=True)
 
 
@@ -31,13 +31,16 @@ class ParamitMode(enum.Enum):
     NOTEBOOK = "notebook"
 
 
-class ParamitVariable(BaseModel):
+@dataclass
+class ParamitVariable:
     name: str
     value: Any
     type: str
     file_name: str
     line: int
     column: int
+    end_line: int
+    end_column: int
 
     def __str__(self):
         return (
@@ -45,200 +48,157 @@ class ParamitVariable(BaseModel):
         )
 
 
-class ParamitMetadata(BaseModel):
+@dataclass
+class ParamitMetadata:
     version: str
     created_on: str
     script_path: str
     python_path: str
 
 
-class ParamitParameter(BaseModel):
+@dataclass
+class ParamitParameter:
     name: str
     type: str
     values: List[Any]
 
 
-class VariableVisitor(cst.CSTVisitor):
-    METADATA_DEPENDENCIES = (PositionProvider,)
+_VARIABLES_CACHE: Dict[Any, List["ParamitVariable"]] = {}
 
-    def __init__(self, file_path: str):
-        self.file_path = file_path
-        self.variables = []
-        self.current_context = []
 
-    def visit_Assign(self, node: cst.Assign):
-        for target in node.targets:
-            if isinstance(target.target, cst.Name) and isinstance(
-                node.value, cst.Integer
-            ):
-                pos = self.get_metadata(PositionProvider, node).start
-                self.add_variable(
-                    target.target.value, node.value.value, pos.line, pos.column
-                )
-            elif isinstance(target.target, cst.Name) and isinstance(
-                node.value, cst.Float
-            ):
-                pos = self.get_metadata(PositionProvider, node).start
-                self.add_variable(
-                    target.target.value, node.value.value, pos.line, pos.column
-                )
-            elif isinstance(target.target, cst.Name) and isinstance(
-                node.value, cst.SimpleString
-            ):
-                pos = self.get_metadata(PositionProvider, node).start
-                self.add_variable(
-                    target.target.value,
-                    node.value.value.strip("'\""),
-                    pos.line,
-                    pos.column,
-                )
-            elif isinstance(target.target, cst.Name) and isinstance(
-                node.value, cst.Name
-            ):
-                if node.value.value == "True" or node.value.value == "False":
-                    pos = self.get_metadata(PositionProvider, node).start
-                    value = True if node.value.value == "True" else False
-                    self.add_variable(target.target.value, value, pos.line, pos.column)
-            elif (
-                isinstance(target.target, cst.Attribute)
-                and isinstance(node.value, cst.SimpleString)
-                and isinstance(target.target.value, cst.Name)
-                and target.target.value.value == "self"
-            ):
-                pass  # Disabled for now
-
-    def visit_Call(self, node: cst.Call):
-        if isinstance(node.func, cst.Name):
-            self.current_context.append(node.func.value)
-        elif isinstance(node.func, cst.Attribute):
-            self.current_context.append(node.func.attr.value)
-
-        # Disabled for now
-        """
-        for arg in node.args:
-            if isinstance(arg, cst.Arg) and isinstance(arg.value, cst.SimpleString):
-                self.add_variable(arg.keyword.value if arg.keyword else None, arg.value)
-        """
-
-    def leave_Call(self, original_node: cst.Call):
-        if self.current_context:
-            self.current_context.pop()
-
-    def visit_FunctionDef(self, node: cst.FunctionDef):
-        pass
-        """
-        if node.name.value == "__init__":
-            params = node.params
-            if params.default_params:
-                for param in params.default_params:
-                    if isinstance(param.default, cst.SimpleString):
-                        pass  # Disabled for now
-                        # self.add_variable(param.name.value, param.default)
-        """
-
-    def visit_ClassDef(self, node: cst.ClassDef):
-        self.current_context.append(node.name.value)
-        for base in node.bases:
-            if isinstance(base.value, cst.Call):
-                self.visit_Call(base.value)
-
-    def leave_ClassDef(self, original_node: cst.ClassDef):
-        self.current_context.pop()
-
-    def add_variable(self, name: str, value: Any, line: int, column: int):
-        full_name = ".".join(self.current_context + [name]) if name else ""
-        self.variables.append(
+def find_variables(tree: ast.Module, path: str) -> List[ParamitVariable]:
+    """Find all variables, their values, and types in the given AST tree.
+
+    Results are cached by ``path``'s (abspath, mtime), and downstream code
+    (index_variable_spans) trusts the cached spans against freshly read
+    bytes, so ``path`` must be the file ``tree`` was parsed from.
+    """
+    try:
+        cache_key = (os.path.abspath(path), os.path.getmtime(path))
+    except OSError:
+        cache_key = None
+    if cache_key is not None:
+        cached = _VARIABLES_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+
+    variables: List[ParamitVariable] = []
+    current_context: List[str] = []
+    # Interned: the same names recur across variables, config keys, and the
+    # per-experiment patching lookups, so equality checks stay pointer-sized.
+    file_name = sys.intern(os.path.basename(path))
+    script_dir = os.path.dirname(path)
+    # The script directory is listed once (lazily) so ordinary string values
+    # can be rejected as paths with a set probe instead of a stat each.
+    dir_entries = None
+
+    def add_variable(name: str, value: Any, value_node: ast.Constant) -> None:
+        nonlocal dir_entries
+        full_name = sys.intern(".".join(current_context + [name])) if name else ""
+        # Expand string values that point at files relative to the script, in
+        # the same pass instead of rewriting the variable list afterwards.
+        if type(value) is str and value != "":
+            first_part = value.split("/", 1)[0].split(os.sep, 1)[0]
+            if not os.path.isabs(value) and first_part not in ("", ".", ".."):
+                if dir_entries is None:
+                    try:
+                        with os.scandir(script_dir or ".") as entries:
+                            dir_entries = {entry.name for entry in entries}
+                    except OSError:
+                        dir_entries = set()
+                probe = first_part in dir_entries
+            else:
+                probe = True
+            if probe:
+                expanded_path = os.path.abspath(os.path.join(script_dir, value))
+                if os.path.exists(expanded_path):
+                    value = expanded_path
+        variables.append(
             ParamitVariable(
                 name=full_name,
                 value=value,
                 type=type(value).__name__,
-                file_name=os.path.basename(self.file_path),
-                line=line,
-                column=column,
+                file_name=file_name,
+                line=value_node.lineno,
+                column=value_node.col_offset,
+                end_line=value_node.end_lineno,
+                end_column=value_node.end_col_offset,
             )
         )
 
+    # Iterative traversal instead of ast.NodeVisitor: no per-node method
+    # dispatch or Python call frames. A sentinel pushed below the children of
+    # a context node restores current_context once those children are done.
+    # Node classes are bound to locals and compared with `type(x) is` so the
+    # hot loop skips both global lookups and isinstance's MRO walk.
+    _Assign = ast.Assign
+    _ClassDef = ast.ClassDef
+    _FunctionDef = ast.FunctionDef
+    _AsyncFunctionDef = ast.AsyncFunctionDef
+    _Name = ast.Name
+    _Constant = ast.Constant
+    _scalar_types = frozenset((int, float, str, bool))
+    # Assign statements only ever live in statement lists, so descent is
+    # limited to those fields; expression subtrees (calls, comprehensions,
+    # operators) are never pushed at all. Resolved once per node type.
+    _stmt_fields = ("body", "orelse", "finalbody", "handlers", "cases")
+    stmt_fields_of: Dict[type, Any] = {}
+
+    pop_context = ("__pop_ctx__",)
+    stack: List[Any] = [tree]
+    append = stack.append
+    pop = stack.pop
+    while stack:
+        node = pop()
+        if node is pop_context:
+            current_context.pop()
+            continue
 
-class VariableTransformer(cst.CSTTransformer):
-    METADATA_DEPENDENCIES = (PositionProvider,)
-
-    ## TODO: Clean all the transformation code
-    ## Instead of taking in a config file, this should take in the same
-    ## ParamitVariable objects that the VariableVisitor generates
-    ## and check against line and column numbers
-    def __init__(self, config: Dict[str, Union[str, int, float, bool]]):
-        self.config = config
-
-    def leave_Assign(
-        self, original_node: cst.Assign, updated_node: cst.Assign
-    ) -> cst.Assign:
-        if len(original_node.targets) == 1:
-            target = original_node.targets[0].target
-            if isinstance(target, cst.Name):
-                name = target.value
-                # pos = self.get_metadata(PositionProvider, original_node).start
-                if name in self.config:
-                    value = self.config[name]
-                    if isinstance(original_node.value, cst.SimpleString):
-                        value_node = cst.SimpleString(value=f"'{value}'")
-                    elif isinstance(
-                        original_node.value, cst.Name
-                    ) and original_node.value.value in ["True", "False"]:
-                        value_node = cst.Name(value="True" if value else "False")
-                    elif isinstance(original_node.value, cst.Integer):
-                        value_node = cst.Integer(str(value))
-                    elif isinstance(original_node.value, cst.Float):
-                        value_node = cst.Float(str(value))
-                    else:
-                        raise ValueError(f"Unsupported type {type(value)}")
-                    return updated_node.with_changes(value=value_node)
-        return updated_node
-
-
-def find_variables(tree: cst.Module, path: str) -> List[ParamitVariable]:
-    """Find all variables, their values, and types in the given CST tree."""
-    visitor = VariableVisitor(file_path=path)
-    wrapper = cst.MetadataWrapper(tree)
-    wrapper.visit(visitor)
-    return visitor.variables
-
-
-def expand_paths_in_global_variables(
-    global_vars: List[ParamitVariable], script_path: str
-) -> List[ParamitVariable]:
-    """Expand the path in the given global variables using the script path."""
-    expanded_vars = []
-    for var in global_vars:
-        if isinstance(var.value, str) and var.value != "":
-            expanded_path = os.path.abspath(
-                os.path.join(os.path.dirname(script_path), var.value)
+        t = type(node)
+        if t is _Assign:
+            value = node.value
+            if type(value) is _Constant and type(value.value) in _scalar_types:
+                for target in node.targets:
+                    if type(target) is _Name:
+                        add_variable(target.id, value.value, value)
+            continue
+
+        # Function bodies are skipped outright: locals only exist while the
+        # function runs and were never meaningful as script parameters, so
+        # descending into them just bloated the config with fake globals.
+        if t is _FunctionDef or t is _AsyncFunctionDef:
+            continue
+
+        # Only class bodies contribute to the dotted context: an Assign can
+        # never sit inside a call expression, so tracking call names (and the
+        # old visitor's separate re-walk of class bases) added nothing.
+        if t is _ClassDef:
+            current_context.append(node.name)
+            append(pop_context)
+
+        fields = stmt_fields_of.get(t)
+        if fields is None:
+            fields = stmt_fields_of[t] = tuple(
+                f for f in t._fields if f in _stmt_fields
             )
-            if os.path.exists(expanded_path):
-                expanded_vars.append(
-                    ParamitVariable(
-                        name=var.name,
-                        value=expanded_path,
-                        type=var.type,
-                        file_name=var.file_name,
-                        line=var.line,
-                        column=var.column,
-                    )
-                )
-            else:
-                expanded_vars.append(var)
-        else:
-            expanded_vars.append(var)
-    return expanded_vars
+        # Children are pushed in reverse so they pop in source order.
+        for field in reversed(fields):
+            for item in reversed(getattr(node, field)):
+                append(item)
+
+    if cache_key is not None:
+        _VARIABLES_CACHE[cache_key] = variables
+    return variables
 
 
 def generate_config_file(
-    tree: cst.Module,
+    tree: ast.Module,
     path: str,
 ) -> Dict[str, Any]:
     """Generate a TOML configuration file with the given global variables."""
     global_vars = find_variables(tree, path)
-    global_vars = expand_paths_in_global_variables(global_vars, path)
-    script_path = path.replace(".toml", ".py")
+    root, ext = os.path.splitext(path)
+    script_path = root + ".py" if ext == ".toml" else path
 
     config = {"global": {}, "meta": {}}
     for var in global_vars:
@@ -246,12 +206,10 @@ def generate_config_file(
         if len(parts) == 1:
             config["global"][parts[0]] = var.value
         else:
-            current_dict = config["global"]
-            for part in parts[:-1]:
-                if part not in current_dict:
-                    current_dict[part] = {}
-                current_dict = current_dict[part]
-            current_dict[parts[-1]] = var.value
+            parent = functools.reduce(
+                lambda d, part: d.setdefault(part, {}), parts[:-1], config["global"]
+            )
+            parent[parts[-1]] = var.value
 
     python_path = get_python_path()
 
@@ -262,7 +220,7 @@ def generate_config_file(
         python_path=python_path if python_path else "",
     )
 
-    config["meta"] = metadata.model_dump()
+    config["meta"] = asdict(metadata)
 
     return config
 
@@ -272,17 +230,99 @@ def load_config_file(path: str) -> dict:
     and return it as a dictionary."""
 
     with open(path, "rb") as f:
-        return tomli.load(f)
+        return tomllib.load(f)
+
+
+def render_value_literal(value: Union[str, int, float, bool], type_name: str) -> str:
+    """Render a config value as a source literal, typed like the original."""
+    if type_name == "str":
+        # repr() keeps simple strings as plain 'quoted' literals but escapes
+        # quotes/newlines that would otherwise produce unparsable source.
+        return repr(value)
+    elif type_name == "bool":
+        return "True" if value else "False"
+    elif type_name in ("int", "float"):
+        return str(value)
+    else:
+        raise ValueError(f"Unsupported type {type_name}")
+
 
+def index_variable_spans(
+    code: str, variables: List[ParamitVariable]
+) -> Tuple[bytes, List[Tuple[Tuple[int, int], str, str]]]:
+    """Map each discovered value literal to its byte span in the source.
+
+    Built once per script so the per-experiment rendering only has to splice
+    new literals into precomputed spans instead of re-walking the variable
+    list geometry every time.
+    """
+    # ast spans are utf-8 byte offsets, so index the encoded source.
+    data = code.encode("utf-8")
+    line_offsets = [0]
+    offset = 0
+    for line in data.splitlines(keepends=True):
+        offset += len(line)
+        line_offsets.append(offset)
+
+    spans = []
+    for var in variables:
+        span = (
+            line_offsets[var.line - 1] + var.column,
+            line_offsets[var.end_line - 1] + var.end_column,
+        )
+        spans.append((span, var.name.rsplit(".", 1)[-1], var.type))
+    return data, spans
 
-def set_global_variables_from_config(
-    tree: cst.Module, config: Dict[str, Dict[str, Union[str, int, float, bool]]]
-) -> cst.Module:
-    """Set global variables in the given CST tree using the values from the config dictionary."""
-    transformer = VariableTransformer(config["global"])
-    wrapper = cst.MetadataWrapper(tree)
-    modified_tree = wrapper.visit(transformer)
-    return modified_tree
+
+def apply_config_to_source(
+    data: bytes,
+    spans: List[Tuple[Tuple[int, int], str, str]],
+    config: Dict[str, Dict[str, Union[str, int, float, bool]]],
+) -> str:
+    """Substitute the config values into the indexed script source.
+
+    Each span carries the exact location of one value literal, so the new
+    literals are spliced into the original source directly. This preserves
+    formatting and comments without re-running a CST transform and full code
+    generation per experiment.
+    """
+    global_config = config["global"]
+
+    patches: Dict[Any, Any] = {}
+    changed = False
+    for span, name, type_name in spans:
+        if name not in global_config:
+            continue
+        value = global_config[name]
+        if isinstance(value, dict):
+            continue
+        literal = render_value_literal(value, type_name).encode("utf-8")
+        if span in patches and patches[span] != literal:
+            # Conflicting values for one literal (e.g. a chained assignment
+            # feeding two config keys): leave the original source untouched.
+            patches[span] = None
+        else:
+            # Literals equal to the source bytes are recorded too, so a later
+            # conflicting value for the same span is still caught above.
+            patches[span] = literal
+            if literal != data[span[0] : span[1]]:
+                changed = True
+
+    if not changed:
+        # Every config value matches its source literal (the common case
+        # when nothing is swept); no splice needed.
+        return data.decode("utf-8")
+
+    parts = []
+    previous_end = 0
+    for (start, end), literal in sorted(patches.items()):
+        if literal is None or literal == data[start:end]:
+            continue
+        parts.append(data[previous_end:start])
+        parts.append(literal)
+        previous_end = end
+    parts.append(data[previous_end:])
+    return b"".join(parts).decode("utf-8")
 
 
 def help_in_args(args: List[str]) -> bool:
@@ -293,32 +333,39 @@ def help_in_args(args: List[str]) -> bool:
 def parse_args(args: List[str]) -> Dict[str, Any]:
     """Parse the given list of arguments into a dictionary."""
     args_dict = {}
-    for arg_index, arg in enumerate(args):
-        if arg in ["--help", "--h"]:
+    arg_index = 0
+    while arg_index < len(args):
+        arg = args[arg_index]
+        arg_index += 1
+        if arg in ["--help", "--h"] or not arg.startswith("--"):
             continue
-        if arg.startswith("--"):
-            if "=" in arg:
-                key, value = arg.split("=")
-            else:
-                key = arg
-                if arg_index + 1 >= len(args):
-                    print(f"{RED}Error: Argument {arg} is missing a value{RESET}")
-                    sys.exit(1)
+        if "=" in arg:
+            key, value = arg.split("=")
+        else:
+            key = arg
+            if arg_index >= len(args):
+                print(f"{RED}Error: Argument {arg} is missing a value{RESET}")
+                sys.exit(1)
+
+            value_parts = []
+            while arg_index < len(args) and not args[arg_index].startswith("--"):
+                value_parts.append(args[arg_index])
+                arg_index += 1
+            value = ",".join(value_parts)
 
-                value = ""
-                while arg_index + 1 < len(args) and not args[arg_index + 1].startswith(
-                    "--"
-                ):
-                    if value:
-                        value += ","
-                    value += args[arg_index + 1]
-                    arg_index += 1
-
-            key = key[2:].replace("-", "_")
-            args_dict[key] = value
+        key = key[2:].replace("-", "_")
+        args_dict[key] = value
     return args_dict
 
 
+# Precompiled once so expand_args_dict doesn't rebuild its classifiers per
+# value; the float pattern also rejects junk like "1.2.3" that the old
+# replace()+isdigit() check let through to a crashing float() call.
+_INT_PATTERN = re.compile(r"\d+\Z")
+_FLOAT_PATTERN = re.compile(r"(?:\d+\.\d*|\.?\d+)(?:e[+-]?\d+)?\Z", re.IGNORECASE)
+_BOOL_TOKENS = frozenset(("true", "false"))
+
+
 def expand_args_dict(args_dict: Dict[str, str]) -> Dict[str, ParamitParameter]:
     """Parse the value in the args according to the special paramit syntax.
 
@@ -339,26 +386,29 @@ def expand_args_dict(args_dict: Dict[str, str]) -> Dict[str, ParamitParameter]:
             print(f"{RED}Error: Argument {arg} must have at least one value{RESET}")
             sys.exit(1)
 
-        value_type = None
-        if all(v.isdigit() for v in values):
+        # Classify in a single pass over the values instead of one all() scan
+        # per candidate type; the priority order (int, float, bool, str) is
+        # unchanged.
+        could_be_int = could_be_float = could_be_bool = True
+        for v in values:
+            if could_be_int and not _INT_PATTERN.match(v):
+                could_be_int = False
+            if could_be_float and not _FLOAT_PATTERN.match(v):
+                could_be_float = False
+            if could_be_bool and v.lower() not in _BOOL_TOKENS:
+                could_be_bool = False
+            if not (could_be_int or could_be_float or could_be_bool):
+                break
+
+        if could_be_int:
             value_type = int
             values = [value_type(v) for v in values]
-        elif all(v.replace(".", "").replace("e", "").isdigit() for v in values):
+        elif could_be_float:
             value_type = float
             values = [value_type(v) for v in values]
-        elif all(v.lower() in ["true", "false"] for v in values):
+        elif could_be_bool:
             value_type = bool
-
-            def str_to_bool(value):
-                if value.lower() == "true":
-                    return True
-                elif value.lower() == "false":
-                    return False
-                else:
-                    print(f"{RED}Error: Bool argument must be True or False{RESET}")
-                    sys.exit(1)
-
-            values = [str_to_bool(v) for v in values]
+            values = [v.lower() == "true" for v in values]
 
         else:
             value_type = str
@@ -421,33 +471,36 @@ def generate_configs_from_hyperparameters(
     if not hyperparameters_range:
         return [base_config]
 
-    # Generate all possible combinations of hyperparameters
-    hyperparameters_combinations = []
-    for i in range(len(hyperparameters_range)):
-        hyperparameter = hyperparameters_range[i]
-        if not hyperparameters_combinations:
-            for value in hyperparameter.values:
-                hyperparameters_combinations.append({hyperparameter.name: value})
-        else:
-            new_combinations = []
-            for combination in hyperparameters_combinations:
-                for value in hyperparameter.values:
-                    new_combination = combination.copy()
-                    new_combination[hyperparameter.name] = value
-                    new_combinations.append(new_combination)
-            hyperparameters_combinations = new_combinations
+    # Generate all possible combinations of hyperparameters, consuming the
+    # product lazily instead of materializing a combination dict per
+    # experiment first.
+    range_names = [h.name for h in hyperparameters_range]
+    range_values = [h.values for h in hyperparameters_range]
+
+    # The target type of every swept key is fixed by the base config, so
+    # resolve each type() once instead of per combination.
+    base_global = base_config["global"]
+    cast_for_key = {
+        name: type(base_global[name]) for name in range_names if name in base_global
+    }
 
     configs: List[Dict[str, Any]] = []
 
-    for combination in hyperparameters_combinations:
-        config = deepcopy(base_config)
-        for key, value in combination.items():
-            if key in config["global"]:
+    for combination in itertools.product(*range_values):
+        # Only top-level keys of "global" are overwritten per combination, so
+        # a one-level copy is enough; "meta" and nested sections are shared.
+        config = {
+            "global": dict(base_config["global"]),
+            "meta": base_config["meta"],
+        }
+        for key, value in zip(range_names, combination):
+            cast = cast_for_key.get(key)
+            if cast is not None:
                 try:
-                    config["global"][key] = type(config["global"][key])(value)
+                    config["global"][key] = cast(value)
                 except ValueError:
                     print(
-                        f"{RED}Error: Argument {key} must be of type {type(config['global'][key])}{RESET}"
+                        f"{RED}Error: Argument {key} must be of type {cast}{RESET}"
                     )
                     sys.exit(1)
             else:
@@ -523,22 +576,26 @@ def is_package_installed(package_name: str) -> bool:
 
 
 def run_code(source_code: str, python_path: str, cwd: str, script_path: str) -> None:
+    import subprocess_tee
+
+    abs_script_path = os.path.abspath(script_path)
     with tempfile.NamedTemporaryFile("w", delete=False) as temp_file:
         # Write the __file__ variable at the top of the file to the original script path
-        temp_file.write(f"__file__ = {repr(os.path.abspath(script_path))}\n")
+        temp_file.write(f"__file__ = {repr(abs_script_path)}\n")
 
         # Write the code to set the original directory as the working directory
-        temp_file.write(f"import os\nos.chdir({repr(os.path.dirname(os.path.abspath(script_path)))})\n")
+        temp_file.write(f"import os\nos.chdir({repr(os.path.dirname(abs_script_path))})\n")
 
         temp_file.write(source_code)
         temp_file_path = temp_file.name
 
     log_file_path = os.path.join(cwd, "console.log")
     try:
+        # Passed as argv so subprocess_tee quotes each element; interpreter
+        # paths with spaces no longer break the command line.
         output = subprocess_tee.run(
-            f"{python_path} -u {temp_file_path}",
+            [python_path, "-u", temp_file_path],
             cwd=cwd,
-            shell=True,
         )
 
         # Save
@@ -551,6 +608,36 @@ def run_code(source_code: str, python_path: str, cwd: str, script_path: str) ->
         os.unlink(temp_file_path)
 
 
+# On 3.13+ the parser hands back a constant-folded tree for free, which also
+# makes folded literals (e.g. negative numbers) visible to discovery.
+_AST_PARSE_FLAGS = ast.PyCF_ONLY_AST | getattr(ast, "PyCF_OPTIMIZED_AST", 0)
+
+_AST_CACHE: Dict[Any, ast.Module] = {}
+
+
+def parse_script_source(code: str, path: str) -> ast.Module:
+    """Parse the script source into an AST, cached by (path, mtime).
+
+    Repeated invocations in the same process (e.g. paramit driven as a
+    library) skip re-parsing scripts that haven't changed on disk. The
+    cache is only sound if ``path`` is the file ``code`` was read from,
+    so callers must pass the resolved script path (not e.g. the config
+    file that pointed at it).
+    """
+    try:
+        key = (os.path.abspath(path), os.path.getmtime(path))
+    except OSError:
+        key = None
+    if key is not None:
+        tree = _AST_CACHE.get(key)
+        if tree is not None:
+            return tree
+    tree = compile(code, path, "exec", _AST_PARSE_FLAGS)
+    if key is not None:
+        _AST_CACHE[key] = tree
+    return tree
+
+
 def main():
     if len(sys.argv) < 3:
         print_usage()
@@ -598,49 +685,57 @@ def main():
                 f"{RED}Error: The config file is not a valid paramit config file{RESET}"
             )
 
-        if not os.path.exists(config["meta"]["script_path"]):
-            print(
-                f"{RED}Error: Python file {config['meta']['script_path']} does not exist{RESET}"
-            )
+        # The code below reads from the script the config points at, not the
+        # config itself, so caches must be keyed by the script's own path.
+        source_path = config["meta"]["script_path"]
+
+        if not os.path.exists(source_path):
+            print(f"{RED}Error: Python file {source_path} does not exist{RESET}")
             sys.exit(1)
 
-        with open(config["meta"]["script_path"], "r") as f:
-            if config["meta"]["script_path"].endswith(".ipynb"):
-                code = convert_ipynb_to_py(config["meta"]["script_path"])
-            elif config["meta"]["script_path"].endswith(".py"):
+        with open(source_path, "r") as f:
+            if source_path.endswith(".ipynb"):
+                from paramit.nb import convert_ipynb_to_py
+
+                code = convert_ipynb_to_py(source_path)
+            elif source_path.endswith(".py"):
                 code = f.read()
             else:
                 print(
-                    f"{RED}Error: Python file {config['meta']['script_path']} is not a Python or Notebook file{RESET}"
+                    f"{RED}Error: Python file {source_path} is not a Python or Notebook file{RESET}"
                 )
                 sys.exit(1)
 
     elif path.endswith(".py"):
+        source_path = path
         with open(path, "r") as f:
             code = f.read()
     elif path.endswith(".ipynb"):
+        from paramit.nb import convert_ipynb_to_py
+
+        source_path = path
         code = convert_ipynb_to_py(path)
 
     try:
-        # We do an extra check here to catch syntax errors w/ helpful messages
-        ast.parse(code)
+        # Parsing with ast also catches syntax errors w/ helpful messages
+        tree = parse_script_source(code, source_path)
     except SyntaxError as e:
-        e.filename = path
+        e.filename = source_path
         print(f"{RED}SyntaxError: {e}{RESET}")
         sys.exit(1)
 
-    tree = cst.parse_module(code)
-
-    config_path = path.replace(".py", ".toml").replace(".ipynb", ".toml")
+    config_path = os.path.splitext(path)[0] + ".toml"
 
     if help_in_args(sys.argv[3:]):
-        generated_config_file = generate_config_file(tree, path)
+        generated_config_file = generate_config_file(tree, source_path)
         print(f"{MAGENTA}Usage: paramit run <path_to_python_file> [args]{RESET}")
         pretty_print_config(generated_config_file)
         sys.exit(0)
 
     elif not os.path.exists(config_path):
-        generated_config = generate_config_file(tree, path)
+        import tomli_w
+
+        generated_config = generate_config_file(tree, source_path)
         with open(config_path, "wb") as f:
             tomli_w.dump(generated_config, f)
 
@@ -650,7 +745,9 @@ def main():
         )
         overwrite = input("Do you want to overwrite it? (y/n): ")
         if overwrite.lower() == "y":
-            generated_config = generate_config_file(tree, path)
+            import tomli_w
+
+            generated_config = generate_config_file(tree, source_path)
 
             with open(config_path, "wb") as f:
                 tomli_w.dump(generated_config, f)
@@ -678,37 +775,69 @@ def main():
         print("Notebook mode only supports running a single experiment")
         sys.exit(1)
 
+    import tomli_w
+
+    base_name = os.path.splitext(os.path.basename(path))[0]
+    patch_data, patch_spans = index_variable_spans(
+        code, find_variables(tree, source_path)
+    )
+
+    # The meta table is shared by every experiment config; serialize it once
+    # and only dump the per-experiment global table inside the loop.
+    meta_toml = tomli_w.dumps({"meta": config["meta"]}).encode("utf-8")
+
+    # Opt-in concurrency for sweeps: each experiment is its own interpreter
+    # process, so threads only exist to overlap the subprocess waits. The
+    # default of one worker preserves ordered console streaming.
+    max_workers = 1
+    if mode == ParamitMode.RUN and len(experiment_configs) > 1:
+        try:
+            max_workers = max(1, int(os.environ.get("HAIPERA_MAX_WORKERS", "1")))
+        except ValueError:
+            max_workers = 1
+    pending_runs = []
+
     for experiment_config in experiment_configs:
         experiment_id = (
             datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
             + "-"
-            + str(uuid.uuid4())[0:8]
+            + os.urandom(4).hex()
         )
         experiment_dir = os.path.join("reports", experiment_id)
         os.makedirs(experiment_dir, exist_ok=True)
-        base_name = os.path.splitext(os.path.basename(path))[0]
 
         # Save the config file in the experiment directory
         with open(os.path.join(experiment_dir, base_name + ".toml"), "wb") as f:
-            tomli_w.dump(experiment_config, f)
-
-        modified_tree = set_global_variables_from_config(tree, experiment_config)
+            f.write(tomli_w.dumps({"global": experiment_config["global"]}).encode("utf-8"))
+            f.write(meta_toml)
 
-        source_code = modified_tree.code
+        source_code = apply_config_to_source(
+            patch_data, patch_spans, experiment_config
+        )
 
         if mode == ParamitMode.RUN:
             with open(os.path.join(experiment_dir, base_name + ".py"), "w") as f:
                 f.write(source_code)
 
             if path.endswith(".ipynb"):
+                from paramit.nb import convert_source_code_to_ipynb
+
                 notebook_path = os.path.join(experiment_dir, base_name + ".ipynb")
                 with open(notebook_path, "w") as f:
                     f.write(convert_source_code_to_ipynb(source_code))
 
-            print(f"Running with the Python interpreter at {python_path}")
-            run_code(source_code, python_path, experiment_dir, orig_script_path)
+            if max_workers > 1:
+                pending_runs.append((source_code, experiment_dir))
+            else:
+                print(f"Running with the Python interpreter at {python_path}")
+                run_code(source_code, python_path, experiment_dir, orig_script_path)
 
         elif mode == ParamitMode.NOTEBOOK:
+            from paramit.nb import (
+                convert_source_code_to_ipynb,
+                is_jupyter_kernel_installed,
+            )
+
             ipykernel_is_installed = is_package_installed("ipykernel")
             if not ipykernel_is_installed:
                 print(
@@ -746,3 +875,34 @@ def main():
                 ],
                 check=True,
             )
+
+    if pending_runs:
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        print(f"Running with the Python interpreter at {python_path}")
+        print(
+            f"{GREEN}Running {len(pending_runs)} experiments "
+            f"with {max_workers} workers{RESET}"
+        )
+        failed = False
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    run_code, source_code, python_path, experiment_dir,
+                    orig_script_path,
+                ): experiment_dir
+                for source_code, experiment_dir in pending_runs
+            }
+            # Collect every result so a worker's exception surfaces instead
+            # of vanishing inside its discarded future.
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    failed = True
+                    print(
+                        f"{RED}Error: experiment in {futures[future]} "
+                        f"failed: {e}{RESET}"
+                    )
+        if failed:
+            sys.exit(1)
@@ -1,17 +1,47 @@
+import ctypes
+import functools
 import subprocess
 import re
 from typing import Optional, Tuple
 
 __all__ = ["get_cuda_version"]
 
+_NVCC_RELEASE_PATTERN = re.compile(r"release (\d+)\.(\d+),")
 
+
+def _get_driver_cuda_version() -> Optional[Tuple[int, int]]:
+    """Ask the CUDA driver library for its version, without a subprocess.
+
+    Works on runtime-only hosts where the toolkit (and nvcc) is absent.
+    """
+    for library_name in ("libcuda.so.1", "libcuda.so", "nvcuda.dll"):
+        try:
+            libcuda = ctypes.CDLL(library_name)
+        except OSError:
+            continue
+        version = ctypes.c_int()
+        try:
+            if libcuda.cuDriverGetVersion(ctypes.byref(version)) == 0:
+                return version.value // 1000, (version.value % 1000) // 10
+        except Exception:
+            pass
+        return None
+    return None
+
+
+@functools.lru_cache(maxsize=1)
 def get_cuda_version() -> Optional[Tuple[int, int]]:
+    # The installed CUDA version cannot change under a running process, so
+    # one cold probe (driver call or nvcc fork) covers all later calls.
+    version = _get_driver_cuda_version()
+    if version is not None:
+        return version
+
+    # Fall back to nvcc for toolkit-only hosts without a loadable driver.
     try:
         output = subprocess.check_output(["nvcc", "--version"]).decode("utf-8")
-        version = re.search(r"release (\S+),", output)
-        if version:
-            version = version.group(1)
-            major, minor = version.split(".")
-            return int(major), int(minor)
+        match = _NVCC_RELEASE_PATTERN.search(output)
+        if match:
+            return int(match.group(1)), int(match.group(2))
     except Exception:
         return None
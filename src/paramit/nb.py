@@ -11,9 +11,22 @@ __all__ = [
 ]
 
 
+# Keyed by (path, mtime): notebook round-trips through jupytext are slow and
+# the CLI may convert the same unchanged file more than once per process.
+_IPYNB_TO_PY_CACHE = {}
+
+
 def convert_ipynb_to_py(ipynb_file: str) -> str:
+    try:
+        key = (os.path.abspath(ipynb_file), os.path.getmtime(ipynb_file))
+    except OSError:
+        key = None
+    if key is not None and key in _IPYNB_TO_PY_CACHE:
+        return _IPYNB_TO_PY_CACHE[key]
     notebook = jupytext.read(ipynb_file)
     py_contents = jupytext.writes(notebook, fmt="py:percent")
+    if key is not None:
+        _IPYNB_TO_PY_CACHE[key] = py_contents
     return py_contents
 
 
@@ -24,6 +37,8 @@ def convert_py_to_ipynb(py_file: str) -> str:
 
 
 def convert_source_code_to_ipynb(source_code: str) -> str:
+    # Not cached: every sweep experiment has distinct patched source, so a
+    # cache here would only pin dead source/notebook pairs in memory.
     notebook = jupytext.reads(source_code, fmt="py:percent")
     ipynb_contents = jupytext.writes(notebook, fmt="ipynb")
     return ipynb_contents